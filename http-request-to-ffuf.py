@@ -4,15 +4,34 @@ HTTP Request Fuzzer - Converts HTTP requests from Burp Suite for use with ffuf
 """
 
 import argparse
+import json
+import multiprocessing
+import os
 import re
 import sys
-import json
-import urllib.parse
-from typing import Dict, List, Optional, Tuple, Union
+from functools import lru_cache, partial
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+# orjson is optional; it parses large JSON bodies several times faster, but
+# rejects some input json accepts (NaN, Infinity, huge numbers, lone
+# surrogates), so fall back to json before treating a body as invalid
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def print_banner():
-    print(r"""
+
+def _loads(data: bytes):
+    """Parses a JSON body, preferring orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+_BANNER = r"""
         "     __  __           _        _        
         |  \/  |         | |      | |       
         | \  / | __ _  __| | ___  | |__  _   _
@@ -29,72 +48,148 @@ def print_banner():
          \__, |_|   \__,_|_| |_|\__(_)__,_|_|   
           __/ |                                
          |___/  
-        """)
+        """
 
 
+def print_banner():
+    sys.stderr.write(_BANNER + "\n")
+
+
+# Lowercased header names looked up by the parser and generator; parsed
+# header keys are interned too, so dict probes can match by identity
+_HDR_HOST = sys.intern('host')
+_HDR_CONTENT_TYPE = sys.intern('content-type')
+_HDR_COOKIE = sys.intern('cookie')
+
+# Body kinds by media type (the Content-Type value before any ';' parameters)
+_CT_KINDS = {
+    'application/json': 'json',
+    'application/x-www-form-urlencoded': 'form',
+    'multipart/form-data': 'multipart',
+}
+
+# (scheme, port suffix) for ports that imply the scheme; anything else is
+# assumed to be plain http on an explicit port
+_SCHEME_BY_PORT = {
+    None: ('http', ''),
+    80: ('http', ''),
+    443: ('https', ''),
+}
+
 
 class HTTPRequest:
     def __init__(self):
         self.method = ""
         self.path = ""
+        self.path_only = ""  # Path without the query string
+        self.query_string = ""
         self.protocol = ""
-        self.headers = {}
-        self.body = ""
+        self.headers = {}  # Keyed by lowercased header name
+        self.headers_original_case = {}  # Lowercased name -> name as sent
+        self.body = b""  # Raw bytes; decoded only when emitted
         self.host = ""
         self.port = None
         self.url = ""
+        self.url_base = ""  # URL without the query string
         self.content_type = ""
         self.is_json = False
         self.is_form = False
         self.is_multipart = False
 
-    def parse_request(self, request_text: str) -> None:
-        """Parses a raw HTTP request."""
-        lines = request_text.strip().split('\n')
+    def parse_request(self, request_data: Union[bytes, str]) -> None:
+        """Parses a raw HTTP request, given as bytes as read from disk or stdin."""
+        if isinstance(request_data, str):
+            request_data = request_data.encode()
+        
+        # Walk the lines of the single buffer by offset; the head ends at the
+        # first line that is empty or whitespace-only, whatever the line endings
+        data = request_data.strip()
+        end = data.find(b'\n')
+        request_line = data if end == -1 else data[:end]
         
         # Parse the request line (METHOD PATH PROTOCOL)
-        request_line = lines[0].strip()
-        parts = request_line.split(' ')
+        parts = request_line.strip().decode('utf-8', 'replace').split(None, 2)
         if len(parts) >= 3:
-            self.method = parts[0]
-            self.path = parts[1]
-            self.protocol = parts[2]
+            self.method, self.path, self.protocol = parts
+            self.path_only, _, self.query_string = self.path.partition('?')
         
         # Parse headers
-        body_start = 0
-        for i, line in enumerate(lines[1:], 1):
-            line = line.strip()
-            if line == "":
-                body_start = i + 1
+        body = b""
+        while end != -1:
+            start = end + 1
+            end = data.find(b'\n', start)
+            raw = data[start:] if end == -1 else data[start:end]
+            if not raw.strip():
+                body = data[end + 1:]
                 break
-            
-            if ':' in line:
-                header_name, header_value = line.split(':', 1)
-                self.headers[header_name.strip()] = header_value.strip()
+            header_name, colon, header_value = raw.partition(b':')
+            if not colon:
+                continue
+            header_name = header_name.strip().decode('utf-8', 'replace')
+            key = sys.intern(header_name.lower())
+            self.headers[key] = header_value.strip().decode('utf-8', 'replace')
+            self.headers_original_case[key] = header_name
         
         # Extract Host and construct URL
-        if 'Host' in self.headers:
-            self.host = self.headers['Host']
-            if ':' in self.host:
-                host_parts = self.host.split(':')
-                self.host = host_parts[0]
-                self.port = int(host_parts[1])
+        if _HDR_HOST in self.headers:
+            self.host, colon, port = self.headers[_HDR_HOST].partition(':')
+            if colon:
+                self.port = int(port)
             
-            # Determine protocol (http/https)
-            protocol = "https" if self.port == 443 else "http"
-            port_str = f":{self.port}" if self.port and self.port not in (80, 443) else ""
-            self.url = f"{protocol}://{self.host}{port_str}{self.path}"
+            # Determine protocol (http/https) and whether the port must be shown
+            scheme, port_str = _SCHEME_BY_PORT.get(self.port, ('http', f":{self.port}"))
+            self.url_base = ''.join((scheme, '://', self.host, port_str, self.path_only))
+            self.url = ''.join((scheme, '://', self.host, port_str, self.path))
         
         # Extract body if it exists
-        if body_start > 0 and body_start < len(lines):
-            self.body = '\n'.join(lines[body_start:])
+        self.body = body.rstrip()
         
         # Determine content type
-        if 'Content-Type' in self.headers:
-            self.content_type = self.headers['Content-Type']
-            self.is_json = 'application/json' in self.content_type
-            self.is_form = 'application/x-www-form-urlencoded' in self.content_type
-            self.is_multipart = 'multipart/form-data' in self.content_type
+        self.content_type = self.headers.get(_HDR_CONTENT_TYPE, '')
+        if self.content_type:
+            media = self.content_type.partition(';')[0].strip().lower()
+            kind = _CT_KINDS.get(media)
+            self.is_json = kind == 'json'
+            self.is_form = kind == 'form'
+            self.is_multipart = kind == 'multipart'
+
+    def body_text(self) -> str:
+        """Returns the body decoded as UTF-8."""
+        return self.body.decode('utf-8', 'replace')
+
+# One match per ';'-separated cookie, as (segment, name, value): segment is
+# the cookie with surrounding whitespace stripped, name may be empty and
+# value is None for bare names
+_COOKIE_RE = re.compile(r'(?:^|;)\s*(([^=;]*?)\s*(?:=([^;]*?))?)\s*(?=;|\Z)')
+
+# Header template bound once at import; used for every emitted -H argument
+_H_TMPL = '-H "%s: %s"'.__mod__
+
+
+def _split_pairs(text: str) -> List[Tuple[str, Optional[str]]]:
+    """Splits a query string or form body into (name, value) pairs without decoding."""
+    pairs = []
+    for item in text.split('&'):
+        name, eq, value = item.partition('=')
+        pairs.append((name, value if eq else None))
+    return pairs
+
+
+def _join_pairs(pairs: List[Tuple[str, Optional[str]]], target: str) -> str:
+    """Rebuilds a query string or form body with the target parameter set to FUZZ."""
+    return '&'.join(
+        "%s=FUZZ" % name if name == target else (name if value is None else "%s=%s" % (name, value))
+        for name, value in pairs
+    )
+
+
+def _json_path(prefix: str, stack: List[Tuple], key: str) -> str:
+    """Formats the path to key from the ancestor stack built by _find_json_param."""
+    path = prefix
+    for (_, in_dict, _), (_, _, segment) in zip(stack, stack[1:]):
+        path = (f"{path}.{segment}" if path else segment) if in_dict else f"{path}[{segment}]"
+    return f"{path}.{key}" if path else key
+
 
 class FuzzerGenerator:
     def __init__(self, http_request: HTTPRequest, param_to_fuzz: str, wordlist: str):
@@ -103,167 +198,257 @@ class FuzzerGenerator:
         self.wordlist = wordlist
         self.fuzz_location = None  # url_param, body_param, json_field, header
         self.fuzz_position = None  # Specific position for fuzzing
+        self._header_key = sys.intern(param_to_fuzz.lower())  # Header names are case-insensitive
+        # Matches the parameter as an unescaped JSON object key, e.g. "param":
+        self._key_probe = re.compile(rb'"' + re.escape(param_to_fuzz.encode()) + rb'"\s*:')
+        # (name, value) pairs split once and reused; value is None for bare names
+        self._query_pairs = []
+        self._body_pairs = []
+        self._cookies = []  # (segment, name, value) per cookie, see _COOKIE_RE
 
     def find_param_location(self) -> bool:
         """Finds the location of the parameter to fuzz."""
         # Search in URL parameters
-        if '?' in self.request.path:
-            path, query = self.request.path.split('?', 1)
-            params = urllib.parse.parse_qs(query)
-            if self.param_to_fuzz in params:
+        if self.request.query_string:
+            self._query_pairs = _split_pairs(self.request.query_string)
+            if any(name == self.param_to_fuzz for name, _ in self._query_pairs):
                 self.fuzz_location = 'url_param'
                 return True
         
         # Search in form-urlencoded body
         if self.request.is_form and self.request.body:
-            params = urllib.parse.parse_qs(self.request.body)
-            if self.param_to_fuzz in params:
+            self._body_pairs = _split_pairs(self.request.body_text())
+            if any(name == self.param_to_fuzz for name, _ in self._body_pairs):
                 self.fuzz_location = 'body_param'
                 return True
         
-        # Search in JSON
-        if self.request.is_json and self.request.body:
+        # Search in JSON, skipping the parse when the key cannot be present.
+        # The probe only sees the raw bytes, so a body with any backslash
+        # escape (which could spell the key, e.g. "a\u0062") is always parsed
+        body = self.request.body
+        if self.request.is_json and body and (b'\\' in body or self._key_probe.search(body)):
             try:
-                json_body = json.loads(self.request.body)
-                # Recursive search in JSON
+                json_body = _loads(body)
+                # Depth-first search in JSON
                 if self._find_json_param(json_body, self.param_to_fuzz):
                     self.fuzz_location = 'json_field'
                     return True
-            except json.JSONDecodeError:
+            except ValueError:
+                # Base of both decoders' JSONDecodeError, and of the
+                # UnicodeDecodeError json raises for non-UTF-8 bytes
                 pass
         
         # Search in headers
-        if self.param_to_fuzz in self.request.headers:
+        if self._header_key in self.request.headers:
             self.fuzz_location = 'header'
             return True
         
         # Search in cookies
-        if 'Cookie' in self.request.headers:
-            cookies = self.request.headers['Cookie'].split(';')
-            for cookie in cookies:
-                if '=' in cookie:
-                    name = cookie.split('=')[0].strip()
-                    if name == self.param_to_fuzz:
-                        self.fuzz_location = 'cookie'
-                        return True
+        if _HDR_COOKIE in self.request.headers:
+            self._cookies = [m.groups() for m in _COOKIE_RE.finditer(self.request.headers[_HDR_COOKIE])]
+            if any(name == self.param_to_fuzz for _, name, value in self._cookies if value is not None):
+                self.fuzz_location = 'cookie'
+                return True
         
         return False
 
     def _find_json_param(self, json_obj: Union[Dict, List], param: str, path: str = "") -> bool:
-        """Recursively searches for a parameter in a JSON object."""
-        if isinstance(json_obj, dict):
-            for key, value in json_obj.items():
-                new_path = f"{path}.{key}" if path else key
-                if key == param:
-                    self.fuzz_position = new_path
+        """Searches depth-first for a parameter in a JSON object."""
+        # Each stack entry is (children iterator, is_dict, key in parent); an
+        # entry is left on the stack while it still has children to visit, so
+        # keys are checked in the same order as a recursive walk would check
+        # them, and the stack itself is the chain of ancestors of the current
+        # node. The path string is only built from it once a match is found.
+        # JSON parsers only produce exact dicts and lists, so compare types
+        # by identity rather than with isinstance
+        t = type(json_obj)
+        if t is dict:
+            stack = [(iter(json_obj.items()), True, None)]
+        elif t is list:
+            stack = [(enumerate(json_obj), False, None)]
+        else:
+            return False
+        
+        while stack:
+            children, is_dict, _ = stack[-1]
+            for key, value in children:
+                if is_dict and key == param:
+                    self.fuzz_position = _json_path(path, stack, key)
                     return True
-                if isinstance(value, (dict, list)):
-                    if self._find_json_param(value, param, new_path):
-                        return True
-        elif isinstance(json_obj, list):
-            for i, item in enumerate(json_obj):
-                new_path = f"{path}[{i}]"
-                if isinstance(item, (dict, list)):
-                    if self._find_json_param(item, param, new_path):
-                        return True
+                tv = type(value)
+                if tv is dict:
+                    stack.append((iter(value.items()), True, key))
+                    break
+                if tv is list:
+                    stack.append((enumerate(value), False, key))
+                    break
+            else:
+                stack.pop()
         return False
 
+    def _emit_plain(self, key: str, value: str) -> str:
+        return _H_TMPL((self.request.headers_original_case[key], value))
+
+    def _emit_header_fuzz(self, key: str, value: str) -> str:
+        if key == self._header_key:
+            value = "FUZZ"
+        return _H_TMPL((self.request.headers_original_case[key], value))
+
+    def _emit_cookie_fuzz(self, key: str, value: str) -> str:
+        if key == _HDR_COOKIE:
+            # Every cookie but the target is emitted exactly as it was sent
+            value = '; '.join(
+                "%s=FUZZ" % name if name == self.param_to_fuzz and value is not None else segment
+                for segment, name, value in self._cookies
+            )
+        return _H_TMPL((self.request.headers_original_case[key], value))
+
     def generate_ffuf_command(self) -> str:
         """Generates the ffuf command based on the parameter location."""
         if not self.fuzz_location:
             raise ValueError(f"Parameter '{self.param_to_fuzz}' not found in the request")
         
-        cmd_parts = [f"ffuf -w {self.wordlist}"]
-        
-        # Add method
-        cmd_parts.append(f"-X {self.request.method}")
-        
-        # Add base URL
+        # Build the URL
         if self.fuzz_location == 'url_param':
             # Replace the parameter value in the URL with FUZZ
-            path, query = self.request.path.split('?', 1)
-            params = []
-            for param in query.split('&'):
-                if '=' in param:
-                    name, value = param.split('=', 1)
-                    if name == self.param_to_fuzz:
-                        params.append(f"{name}=FUZZ")
-                    else:
-                        params.append(param)
-                else:
-                    params.append(param)
-            
-            new_path = f"{path}?{'&'.join(params)}"
-            url_parts = self.request.url.split('?', 1)
-            base_url = url_parts[0]
-            cmd_parts.append(f"-u \"{base_url}{new_path}\"")
+            # Without a Host header there is no URL base, only the path
+            base = self.request.url_base or self.request.path_only
+            url_arg = f"{base}?{_join_pairs(self._query_pairs, self.param_to_fuzz)}"
         else:
-            cmd_parts.append(f"-u \"{self.request.url}\"")
+            url_arg = self.request.url
         
-        # Add headers
-        for name, value in self.request.headers.items():
-            # Handle special case of fuzzing in headers or cookies
-            if self.fuzz_location == 'header' and name == self.param_to_fuzz:
-                cmd_parts.append(f"-H \"{name}: FUZZ\"")
-            elif self.fuzz_location == 'cookie' and name == 'Cookie':
-                cookies = []
-                for cookie in value.split(';'):
-                    if '=' in cookie:
-                        cookie_name, cookie_value = cookie.split('=', 1)
-                        cookie_name = cookie_name.strip()
-                        if cookie_name == self.param_to_fuzz:
-                            cookies.append(f"{cookie_name}=FUZZ")
-                        else:
-                            cookies.append(cookie.strip())
-                    else:
-                        cookies.append(cookie.strip())
-                cmd_parts.append(f"-H \"Cookie: {'; '.join(cookies)}\"")
-            else:
-                cmd_parts.append(f"-H \"{name}: {value}\"")
+        # Build headers, choosing the emitter once rather than per header
+        if self.fuzz_location == 'header':
+            emit = self._emit_header_fuzz
+        elif self.fuzz_location == 'cookie':
+            emit = self._emit_cookie_fuzz
+        else:
+            emit = self._emit_plain
+        header_strs = [emit(key, value) for key, value in self.request.headers.items()]
         
-        # Handle body
+        # Build body
+        body_parts = ()
         if self.request.body and self.request.method in ('POST', 'PUT', 'PATCH'):
+            body = self.request.body_text()
             if self.fuzz_location == 'body_param' and self.request.is_form:
                 # Replace the parameter value in the form-urlencoded body
-                params = []
-                for param in self.request.body.split('&'):
-                    if '=' in param:
-                        name, value = param.split('=', 1)
-                        if name == self.param_to_fuzz:
-                            params.append(f"{name}=FUZZ")
-                        else:
-                            params.append(param)
-                    else:
-                        params.append(param)
-                
-                cmd_parts.append(f"-d \"{self.request.body}\"")
+                body_parts = (f"-d \"{_join_pairs(self._body_pairs, self.param_to_fuzz)}\"",)
             elif self.fuzz_location == 'json_field' and self.request.is_json:
-                # For JSON we need to use -fuzzing-mode for JSON path
-                cmd_parts.append(f"-d '{self.request.body}'")
-                cmd_parts.append(f"-mode pitchfork")
-                # Use the JSON position found for FUZZ
-                cmd_parts.append(f"-json '{self.fuzz_position}:FUZZ'")
+                # For JSON we need to use -fuzzing-mode for JSON path,
+                # with the JSON position found for FUZZ
+                body_parts = (
+                    f"-d '{body}'",
+                    "-mode pitchfork",
+                    f"-json '{self.fuzz_position}:FUZZ'",
+                )
             else:
-                cmd_parts.append(f"-d '{self.request.body}'")
+                body_parts = (f"-d '{body}'",)
         
-        return " ".join(cmd_parts)
+        return " ".join((
+            "ffuf -w " + self.wordlist,
+            "-X " + self.request.method,
+            f"-u \"{url_arg}\"",
+            *header_strs,
+            *body_parts,
+        ))
+
+@lru_cache(maxsize=256)
+def build_fuzzer(request_data: bytes, param: str, wordlist: str) -> FuzzerGenerator:
+    """Parses a request and locates the parameter to fuzz, caching the result.
+    
+    The returned generator is shared between calls with the same arguments,
+    so callers must treat it as read-only. If the parameter was not found,
+    its fuzz_location is None.
+    """
+    http_request = HTTPRequest()
+    http_request.parse_request(request_data)
+    
+    fuzzer = FuzzerGenerator(http_request, param, wordlist)
+    fuzzer.find_param_location()
+    return fuzzer
+
+def iter_request_files(directory: str) -> Iterator[str]:
+    """Yields the paths of the request files in a directory, skipping hidden files."""
+    with os.scandir(directory) as entries:
+        paths = sorted(e.path for e in entries if e.is_file() and not e.name.startswith('.'))
+    yield from paths
+
+def _process_one(path: str, param: str, wordlist: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Builds the ffuf command for one request file, returning (path, command, error)."""
+    try:
+        with open(path, 'rb') as f:
+            request_data = f.read()
+        fuzzer = build_fuzzer(request_data, param, wordlist)
+        if not fuzzer.fuzz_location:
+            return path, None, f"The parameter '{param}' was not found in the request."
+        return path, fuzzer.generate_ffuf_command(), None
+    except Exception as e:
+        return path, None, str(e)
+
+def run_batch(directory: str, param: str, wordlist: str, output: Optional[str] = None) -> bool:
+    """Generates one ffuf command per request file in a directory, using all cores.
+    
+    Commands are written one per line, in completion order, to the output
+    file or stdout; failures are reported on stderr. Returns False if any
+    request failed.
+    """
+    try:
+        paths = list(iter_request_files(directory))
+    except OSError as e:
+        print(f"Error: Cannot read the directory {directory}: {e.strerror}", file=sys.stderr)
+        return False
+    
+    try:
+        out = open(output, 'w') if output else sys.stdout
+    except OSError as e:
+        print(f"Error: Cannot write to {output}: {e.strerror}", file=sys.stderr)
+        return False
+    
+    ok = True
+    try:
+        worker = partial(_process_one, param=param, wordlist=wordlist)
+        with multiprocessing.Pool() as pool:
+            for path, ffuf_command, error in pool.imap_unordered(worker, paths, chunksize=32):
+                if error:
+                    print(f"Error: {path}: {error}", file=sys.stderr)
+                    ok = False
+                else:
+                    out.write(ffuf_command + '\n')
+    finally:
+        if output:
+            out.close()
+    if output:
+        print(f"ffuf commands saved to {output}")
+    return ok
+
+# Built once at import so repeated in-process calls to main() reuse it
+_PARSER = argparse.ArgumentParser(description='Converts HTTP requests to ffuf commands')
+_PARSER.add_argument('-p', '--param', required=True, help='Parameter to fuzz')
+_PARSER.add_argument('-w', '--wordlist', required=True, help='Path to the wordlist')
+_source = _PARSER.add_mutually_exclusive_group()
+_source.add_argument('-r', '--request', help='File with the HTTP request (if not specified, reads from stdin)')
+_source.add_argument('-b', '--batch', metavar='DIR', help='Directory of HTTP request files, one ffuf command per file')
+_PARSER.add_argument('-o', '--output', help='Output file for the ffuf command')
+_PARSER.add_argument('-v', '--verbose', action='store_true', help='Verbose mode (not available with --batch)')
+_PARSER.add_argument('-q', '--quiet', action='store_true', help='Do not print the banner')
 
 def main():
-    print_banner()
-    parser = argparse.ArgumentParser(description='Converts HTTP requests to ffuf commands')
-    parser.add_argument('-p', '--param', required=True, help='Parameter to fuzz')
-    parser.add_argument('-w', '--wordlist', required=True, help='Path to the wordlist')
-    parser.add_argument('-r', '--request', help='File with the HTTP request (if not specified, reads from stdin)')
-    parser.add_argument('-o', '--output', help='Output file for the ffuf command')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose mode')
+    args = _PARSER.parse_args()
+    # The banner goes to stderr, and only for interactive use, so stdout
+    # carries nothing but the command when used in a pipeline
+    if not args.quiet and sys.stderr.isatty():
+        print_banner()
     
-    args = parser.parse_args()
+    if args.batch and args.verbose:
+        _PARSER.error("argument -v/--verbose: not allowed with argument -b/--batch")
+    if args.batch:
+        sys.exit(0 if run_batch(args.batch, args.param, args.wordlist, args.output) else 1)
     
     # Read the request
     if args.request:
         try:
-            with open(args.request, 'r') as f:
-                request_text = f.read()
+            with open(args.request, 'rb') as f:
+                request_data = f.read()
         except FileNotFoundError:
             print(f"Error: The file {args.request} does not exist.", file=sys.stderr)
             sys.exit(1)
@@ -271,18 +456,16 @@ def main():
         # Read from stdin
         if sys.stdin.isatty():
             print("Enter the HTTP request (press Ctrl+D when done):", file=sys.stderr)
-        request_text = sys.stdin.read()
-        if not request_text:
+        request_data = sys.stdin.buffer.read()
+        if not request_data:
             print("Error: No HTTP request provided.", file=sys.stderr)
             sys.exit(1)
     
     # Process the request
     try:
-        http_request = HTTPRequest()
-        http_request.parse_request(request_text)
-        
-        fuzzer = FuzzerGenerator(http_request, args.param, args.wordlist)
-        if not fuzzer.find_param_location():
+        fuzzer = build_fuzzer(request_data, args.param, args.wordlist)
+        http_request = fuzzer.request
+        if not fuzzer.fuzz_location:
             print(f"Error: The parameter '{args.param}' was not found in the request.", file=sys.stderr)
             sys.exit(1)
         